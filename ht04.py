@@ -10,16 +10,63 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import errno
+import itertools
 import logging
 import os
-from pathlib import Path
-from typing import Iterable, Sequence
+import re
+import shutil
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path, PurePosixPath
+from queue import SimpleQueue
+from typing import Iterator, NamedTuple, Sequence
 
 import aioshutil # pip install aioshutil
 
+try:
+    import uvloop  # опційно: pip install uvloop (лише POSIX)
+except ImportError:
+    uvloop = None
+
+
+_IS_WINDOWS = os.name == "nt"
+
+# Розмір порції файлів, яку обхід передає планувальнику за одне звернення до потоку
+_WALK_BATCH = 256
+
+# Кеш "розширення -> назва підпапки" для ext_folder_name
+_ext_cache: dict[str, str] = {}
+
+# os.copy_file_range є лише на Linux; на інших ОС копіює aioshutil.copy2
+_HAS_COPY_FILE_RANGE = hasattr(os, "copy_file_range")
+# Помилки, з якими copy_file_range не працює для конкретної ФС — тоді звичайне копіювання
+_COPY_FALLBACK_ERRNOS = frozenset({errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP})
+
+
+# Рекомендована паралельність копіювання: задача I/O-bound, тож її межує черга диска, а не CPU
+_WORKERS_SSD = 64
+_WORKERS_HDD = 4
+_WORKERS_DEFAULT = 8
+
+
+# Коди результату копіювання (заодно індекси лічильників у read_folder)
+_OK, _LOCKED, _FAILED = 0, 1, 2
+
+# Елемент обходу: (повний шлях, ім'я файлу)
+FileItem = tuple[str, str]
+
 
 # --------------------------- CLI & Logging ---------------------------
 
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"очікується додатне ціле число, отримано: {value}")
+    return number
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Асинхронне сортування файлів за розширенням (на базі aioshutil)."
@@ -36,9 +83,10 @@ def build_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument(
         "--max-workers",
-        type=int,
-        default=min(32, (os.cpu_count() or 4) * 5),
-        help="Макс. кількість одночасних копіювань (за замовчуванням залежить від CPU).",
+        type=_positive_int,
+        default=None,
+        help="Макс. кількість одночасних копіювань (за замовчуванням залежить від типу диска: "
+             f"SSD/NVMe — {_WORKERS_SSD}, HDD — {_WORKERS_HDD}, невідомий — {_WORKERS_DEFAULT}).",
     )
     parser.add_argument(
         "--log-level",
@@ -66,144 +114,543 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--exclude-glob",
         action="append",
+        type=_exclude_glob,
         default=[],
-        help="Глоб-шаблон для виключення (можна вказувати кілька разів). Напр.: --exclude-glob '*/Unity/*' --exclude-glob '*/steam_autocloud.vdf'"
+        help="Глоб-шаблон для виключення (можна вказувати кілька разів). Напр.: --exclude-glob '*/Unity/*' --exclude-glob '*/steam_autocloud.vdf'. "
+             "Шаблони '<шлях>/*' та '<шлях>/<ім'я>' (напр. '**/node_modules') відкидають директорію разом з усім "
+             "вкладеним деревом; шаблон без '/' (напр. 'Thumbs.db') стосується лише файлів."
     )
     return parser
 
 
-def setup_logging(level: str) -> None:
-    logging.basicConfig(
-        level=getattr(logging, level),
-        format="%(asctime)s [%(levelname)s] %(message)s",
-    )
+# QueueHandler, що кладе в чергу сирий запис. Стандартний prepare() форматує повідомлення
+# (msg % args, traceback) у потоці, що логує; тут це робить handler у потоці listener.
+class _RawQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+# Логи форматуються й пишуться у фоновому потоці QueueListener: цикл подій лише кладе
+# запис у чергу. Повертає listener, який треба зупинити (stop) перед виходом, щоб дописати чергу.
+def setup_logging(level: str) -> QueueListener:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+
+    log_queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, level))
+    root.addHandler(_RawQueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    return listener
 
 
 # --------------------------- Helpers ---------------------------
 
-# Генератор для рекурсивного обходу файлів у директорії
-def iter_files_recursive(root: Path, excludes: Sequence[str]) -> Iterable[Path]:
-    for p in root.rglob("*"):
-        if not p.is_file():
+# Чи містить шаблон glob-символи
+def _has_magic(pattern: str) -> bool:
+    return any(ch in pattern for ch in "*?[")
+
+# Нормалізація шаблону так, як її робив PurePath у PurePath.match: '\\' -> '/',
+# без './', кінцевого '/' та повторних '//' ('./a//b/' -> 'a/b')
+def _normalize_glob(pattern: str) -> str:
+    return PurePosixPath(pattern.replace("\\", "/")).as_posix()
+
+# Розділення exclude-шаблонів на ті, що відсікають цілі директорії, та файлові
+def _split_excludes(excludes: Sequence[str]) -> tuple[list[str], list[str]]:
+    dir_patterns: list[str] = []
+    file_patterns: list[str] = []
+    for pat in excludes:
+        pat = _normalize_glob(pat)
+        head, _, tail = pat.rpartition("/")
+        if head and tail in ("*", "**"):
+            # '*/Unity/*' -> директорія '*/Unity' відкидається разом із вмістом
+            dir_patterns.append(head)
             continue
-        if excludes:
-            rel = str(p.relative_to(root)).replace("\\", "/")
-            skip = False
-            for pat in excludes:
-                if Path(rel).match(pat):
-                    skip = True
-                    break
-            if skip:
-                logging.debug("Excluded by glob %r: %s", pat, p)
-                continue
-        yield p
-
-# Отримання назви папки за розширенням файлу
-def ext_folder_name(path: Path) -> str:
-    ext = path.suffix.lower().lstrip(".")
-    return ext if ext else "no_extension"
-
-# Отримання унікального шляху для файлу в цільовій директорії
-def _unique_target_path(dst_dir: Path, filename: str) -> Path:
-    candidate = dst_dir / filename
-    if not candidate.exists():
-        return candidate
-
-    stem = Path(filename).stem
-    suffix = Path(filename).suffix
-    i = 1
-    while True:
-        candidate = dst_dir / f"{stem} ({i}){suffix}"
-        if not candidate.exists():
-            return candidate
+        if head and not _has_magic(tail):
+            # Буквальне ім'я з префіксом шляху ('**/node_modules') може бути як директорією,
+            # так і файлом; голе ім'я ('Thumbs.db') — лише файл
+            dir_patterns.append(pat)
+        file_patterns.append(pat)
+    return dir_patterns, file_patterns
+
+# Exclude-шаблони, розкладені за найдешевшим способом перевірки.
+# Шаблони без '/' стосуються лише останнього компонента (як у PurePath.match), тож
+# перевіряються на entry.name без обчислення відносного шляху.
+class GlobMatcher(NamedTuple):
+    names: frozenset[str]           # 'Thumbs.db' -> name == ...
+    name_prefixes: tuple[str, ...]  # 'cache*' -> name.startswith
+    name_suffixes: tuple[str, ...]  # '*.tmp' -> name.endswith
+    exact: frozenset[str]           # 'foo/bar' -> rel == ...
+    suffixes: tuple[str, ...]       # '*/Unity', 'foo/bar' -> rel.endswith('/Unity'), rel.endswith('/foo/bar')
+    regex: re.Pattern[str] | None   # решта шаблонів — одним regex
+
+# Glob -> regex із семантикою PurePath.match: шаблон зіставляється з правого кінця шляху
+# покомпонентно, тож '*', '?' і набори '[...]' не перетинають '/'
+def _glob_to_regex(pattern: str) -> str:
+    parts: list[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        ch = pattern[i]
         i += 1
+        if ch == "*":
+            parts.append("[^/]*")
+        elif ch == "?":
+            parts.append("[^/]")
+        elif ch == "[":
+            j = i
+            if j < n and pattern[j] == "!":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] not in "]/":
+                j += 1
+            if j >= n or pattern[j] == "/":
+                # Незакритий набір (або '/' всередині, тобто межа компонента) — це літерал '['
+                parts.append(re.escape(ch))
+                continue
+            parts.append(_glob_set_to_regex(pattern[i:j]))
+            i = j + 1
+        else:
+            parts.append(re.escape(ch))
+    return "(?:.*/)?" + "".join(parts) + r"\Z"
+
+# Вміст набору '[...]' -> regex так само, як у fnmatch.translate: провідний '^' — літерал,
+# порожні (обернені) діапазони відкидаються; '/' набір ніколи не збігає
+def _glob_set_to_regex(stuff: str) -> str:
+    if "-" not in stuff:
+        stuff = stuff.replace("\\", r"\\")
+    else:
+        chunks: list[str] = []
+        i = 0
+        k = 2 if stuff[0] == "!" else 1
+        while True:
+            k = stuff.find("-", k)
+            if k < 0:
+                break
+            chunks.append(stuff[i:k])
+            i = k + 1
+            k = k + 3
+        chunk = stuff[i:]
+        if chunk:
+            chunks.append(chunk)
+        else:
+            chunks[-1] += "-"
+        for k in range(len(chunks) - 1, 0, -1):
+            if chunks[k - 1][-1] > chunks[k][0]:
+                chunks[k - 1] = chunks[k - 1][:-1] + chunks[k][1:]
+                del chunks[k]
+        stuff = "-".join(c.replace("\\", r"\\").replace("-", r"\-") for c in chunks)
+    stuff = re.sub(r"([&~|])", r"\\\1", stuff)
+    if not stuff:
+        return "(?!)"
+    if stuff == "!":
+        return "[^/]"
+    if stuff[0] == "!":
+        stuff = "^" + stuff[1:]
+    elif stuff[0] in ("^", "["):
+        stuff = "\\" + stuff
+    return f"(?!/)[{stuff}]"
+
+# Перевірка exclude-шаблону для CLI: помилка в шаблоні — це помилка використання, а не збій копіювання
+def _exclude_glob(value: str) -> str:
+    pattern = _normalize_glob(value)
+    if pattern == ".":
+        raise argparse.ArgumentTypeError(f"порожній glob-шаблон: {value!r}")
+    try:
+        re.compile(_glob_to_regex(pattern))
+    except re.error as exc:
+        raise argparse.ArgumentTypeError(f"некоректний glob-шаблон {value!r}: {exc}") from exc
+    return value
+
+# Розкладання glob-шаблонів за типом перевірки (None, якщо шаблонів немає).
+# Шаблони мають бути вже нормалізовані _normalize_glob: літерали з names/exact порівнюються
+# з іменем/шляхом напряму. На Windows літерали зводяться до нижнього регістру, як і шляхи.
+def _compile_globs(patterns: Sequence[str]) -> GlobMatcher | None:
+    if not patterns:
+        return None
+    names: set[str] = set()
+    name_prefixes: list[str] = []
+    name_suffixes: list[str] = []
+    exact: set[str] = set()
+    suffixes: list[str] = []
+    complex_patterns: list[str] = []
+    for pat in patterns:
+        literal = pat.lower() if _IS_WINDOWS else pat
+        tail = literal.lstrip("*")
+        head = literal.rstrip("*")
+        if "/" not in literal:
+            if not _has_magic(literal):
+                names.add(literal)
+            elif tail and tail != literal and not _has_magic(tail):
+                name_suffixes.append(tail)
+            elif head and head != literal and not _has_magic(head):
+                name_prefixes.append(head)
+            else:
+                complex_patterns.append(pat)
+        elif not _has_magic(literal):
+            exact.add(literal)
+            suffixes.append("/" + literal)
+        elif tail.startswith("/") and tail != literal and not _has_magic(tail):
+            suffixes.append(tail)
+        else:
+            complex_patterns.append(pat)
+
+    regex = None
+    if complex_patterns:
+        flags = re.DOTALL | (re.IGNORECASE if _IS_WINDOWS else 0)
+        regex = re.compile("|".join(f"(?:{_glob_to_regex(p)})" for p in complex_patterns), flags)
+    return GlobMatcher(frozenset(names), tuple(name_prefixes), tuple(name_suffixes),
+                       frozenset(exact), tuple(suffixes), regex)
+
+# Перевірка запису обходу за шаблонами; rel_start — довжина префікса кореня в entry.path
+def _is_excluded(matcher: GlobMatcher, entry: os.DirEntry[str], rel_start: int) -> bool:
+    name = entry.name.lower() if _IS_WINDOWS else entry.name
+    if (name in matcher.names
+            or name.startswith(matcher.name_prefixes)
+            or name.endswith(matcher.name_suffixes)):
+        return True
+    if not (matcher.exact or matcher.suffixes or matcher.regex is not None):
+        return False
+    rel = entry.path[rel_start:].replace(os.sep, "/")
+    if _IS_WINDOWS:
+        rel = rel.lower()
+    return (rel in matcher.exact
+            or rel.endswith(matcher.suffixes)
+            or (matcher.regex is not None and matcher.regex.match(rel) is not None))
+
+# Компіляція exclude-шаблонів: (шаблони для директорій, шаблони для файлів)
+def compile_excludes(excludes: Sequence[str]) -> tuple[GlobMatcher | None, GlobMatcher | None]:
+    dir_patterns, file_patterns = _split_excludes(excludes)
+    return _compile_globs(dir_patterns), _compile_globs(file_patterns)
+
+# Рекурсивний обхід файлів у директорії (виключені директорії не обходяться).
+# Повертає (повний шлях, ім'я файлу) без побудови Path на кожен файл.
+def iter_files_recursive(root: Path, dir_rules: GlobMatcher | None,
+                         file_rules: GlobMatcher | None) -> Iterator[FileItem]:
+    if dir_rules is None and file_rules is None:
+        return _iter_all(root)
+    return _iter_filtered(root, dir_rules, file_rules)
+
+# Обхід без exclude-шаблонів: відносні шляхи не обчислюються взагалі
+def _iter_all(root: Path) -> Iterator[FileItem]:
+    stack = [os.fspath(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            it = os.scandir(current)
+        except OSError as exc:
+            logging.warning("Не вдалося прочитати директорію '%s': %s", current, exc)
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path, entry.name
+
+# Обхід із перевіркою exclude-шаблонів для директорій і файлів
+def _iter_filtered(root: Path, dir_rules: GlobMatcher | None,
+                   file_rules: GlobMatcher | None) -> Iterator[FileItem]:
+    root_str = os.fspath(root)
+    rel_start = len(os.path.join(root_str, ""))
+    stack = [root_str]
+    # Рівень логування не змінюється під час обходу — перевіряємо один раз
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    while stack:
+        current = stack.pop()
+        try:
+            it = os.scandir(current)
+        except OSError as exc:
+            logging.warning("Не вдалося прочитати директорію '%s': %s", current, exc)
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if dir_rules is not None and _is_excluded(dir_rules, entry, rel_start):
+                        if debug:
+                            logging.debug("Excluded by glob: %s", entry.path)
+                        continue
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    if file_rules is not None and _is_excluded(file_rules, entry, rel_start):
+                        if debug:
+                            logging.debug("Excluded by glob: %s", entry.path)
+                        continue
+                    yield entry.path, entry.name
+
+# Отримання назви папки за розширенням файлу (з кешем: різних розширень небагато)
+def ext_folder_name(name: str) -> str:
+    head, _, ext = name.rpartition(".")
+    if not head:
+        # Як у PurePath.suffix: без крапки або крапка лише на початку ('.bashrc') — розширення немає;
+        # '..cfg' -> 'cfg', 'file.' -> ''
+        ext = ""
+    folder = _ext_cache.get(ext)
+    if folder is None:
+        folder = _ext_cache[ext] = ext.lower() or "no_extension"
+    return folder
+
+# Ключ імені файлу для перевірки колізій. Регістр ігнорується завжди: цільова ФС може бути
+# нечутливою до нього і не на Windows (APFS/HFS+, exFAT/NTFS на Linux); зайвий суфікс ' (n)'
+# на чутливій ФС дешевший за тихий перезапис файлу.
+def _name_key(name: str) -> str:
+    return name.casefold()
+
+# Створення цільової директорії та отримання множини вже наявних у ній імен
+def _prepare_dir(dst_dir: str) -> set[str]:
+    os.makedirs(dst_dir, exist_ok=True)
+    with os.scandir(dst_dir) as it:
+        return {_name_key(e.name) for e in it}
+
+# Резервування унікального імені для файлу в цільовій директорії (без stat на кожного кандидата)
+# (reserved і locks ключуються назвою підпапки — без Path на кожен файл)
+async def _reserve_target(out_root: str, folder: str, filename: str,
+                          reserved: dict[str, set[str]],
+                          locks: defaultdict[str, asyncio.Lock]) -> str:
+    # Окремий лок на кожну підпапку: різні розширення не чекають одне на одного
+    async with locks[folder]:
+        names = reserved.get(folder)
+        if names is None:
+            # Перше звернення до підпапки: mkdir + scandir один раз на розширення
+            names = reserved[folder] = await asyncio.to_thread(
+                _prepare_dir, os.path.join(out_root, folder))
+
+        candidate = filename
+        if _name_key(candidate) in names:
+            stem, suffix = os.path.splitext(filename)
+            i = 1
+            while True:
+                candidate = f"{stem} ({i}){suffix}"
+                if _name_key(candidate) not in names:
+                    break
+                i += 1
+        names.add(_name_key(candidate))
+    return os.path.join(out_root, folder, candidate)
 
 # Перевірка, чи є помилка пов'язана з заблокованим файлом (WinError 32 тощо)
 def _is_locked_error(exc: BaseException) -> bool:
-    # На Windows locked-файл часто дає PermissionError WinError 32
-    msg = str(exc)
-    return isinstance(exc, PermissionError) and ("WinError 32" in msg or "process cannot access" in msg.lower())
+    # На Windows locked-файл дає PermissionError з winerror=32 (ERROR_SHARING_VIOLATION)
+    return _IS_WINDOWS and isinstance(exc, PermissionError) and getattr(exc, "winerror", None) == 32
 
 # Асинхронне створення директорії (в окремому потоці)
 async def _mkdir_async(path: Path) -> None:
     await asyncio.to_thread(path.mkdir, parents=True, exist_ok=True)
 
+# Наступна порція файлів з генератора обходу (викликається в окремому потоці).
+# Порція впорядкована за цільовою підпапкою, щоб одночасні копіювання писали в одну директорію.
+def _next_batch(files: Iterator[FileItem]) -> list[FileItem]:
+    batch = list(itertools.islice(files, _WALK_BATCH))
+    batch.sort(key=lambda item: ext_folder_name(item[1]))
+    return batch
+
+# Копіювання вмісту відкритого файлу в dst через os.copy_file_range (без буфера в user-space).
+# True — ФС не підтримує copy_file_range і треба звичайне копіювання.
+def _copy_range(src_fd: int, dst: str, size: int) -> bool:
+    dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    copied = 0
+    try:
+        while True:
+            n = os.copy_file_range(src_fd, dst_fd, max(size - copied, 1 << 20))
+            if n == 0:
+                break
+            copied += n
+    except OSError as exc:
+        if copied or exc.errno not in _COPY_FALLBACK_ERRNOS:
+            raise
+        return True
+    finally:
+        os.close(dst_fd)
+    return False
+
+# Жорстке посилання на вже скопійований файл замість повторного копіювання
+def _link_existing(existing: str | None, dst: str) -> bool:
+    if existing is None:
+        return False
+    try:
+        os.link(existing, dst)
+    except OSError as exc:
+        logging.debug("Не вдалося створити hard link '%s' -> '%s': %s", dst, existing, exc)
+        return False
+    return True
+
+# Копіювання файлу в ядрі + метадані як у copy2.
+# Hard links у джерелі перевіряються тут, по fstat уже відкритого файлу, а не stat-ом на кожен
+# файл під час обходу: перше входження inode копіюється, решта чекають на його future
+# у copied і стають посиланнями на першу копію (None у future — копія не вдалася, копіюємо самі).
+def _fast_copy(src: str, dst: str, copied: dict[tuple[int, int], Future[str | None]]) -> None:
+    first_copy: Future[str | None] | None = None
+    done = False
+    try:
+        src_fd = os.open(src, os.O_RDONLY)
+        try:
+            st = os.fstat(src_fd)
+            if st.st_nlink > 1:
+                first_copy = Future()
+                existing = copied.setdefault((st.st_dev, st.st_ino), first_copy)
+                if existing is not first_copy:
+                    first_copy = None
+                    if _link_existing(existing.result(), dst):
+                        return
+            fallback = _copy_range(src_fd, dst, st.st_size)
+        finally:
+            os.close(src_fd)
+
+        if fallback:
+            shutil.copyfile(src, dst)
+        shutil.copystat(src, dst)
+        done = True
+    finally:
+        if first_copy is not None:
+            first_copy.set_result(dst if done else None)
+
+# Асинхронне копіювання одного файлу: copy_file_range у потоці на Linux, інакше aioshutil.copy2.
+# io_uring навмисно не використовується: дані й так копіюються в ядрі, а на файл лишається
+# один перехід у потік; окремий ring і сторонній біндинг тут нічого суттєвого не дають.
+# Дедуплікація hard links (copied) працює лише на шляху copy_file_range.
+async def _copy2(src: str, dst: str, copied: dict[tuple[int, int], Future[str | None]]) -> None:
+    if _HAS_COPY_FILE_RANGE:
+        await asyncio.to_thread(_fast_copy, src, dst, copied)
+    else:
+        await aioshutil.copy2(src, dst)
+
+# Чи є блочний пристрій, на якому лежить шлях, обертовим (HDD). None — невідомо (не Linux, мережа, tmpfs)
+def _is_rotational(path: Path) -> bool | None:
+    if not path.exists():
+        # Для ще не створеної цільової папки дивимось на найближчого наявного предка
+        path = next((p for p in path.absolute().parents if p.exists()), path)
+    try:
+        dev = os.stat(path).st_dev
+        sys_dev = Path(f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}").resolve()
+        # Для розділу (sda1) атрибут queue є лише в батьківського диска (sda)
+        for candidate in (sys_dev / "queue" / "rotational", sys_dev.parent / "queue" / "rotational"):
+            if candidate.exists():
+                return candidate.read_text().strip() == "1"
+    except (OSError, AttributeError):
+        pass
+    return None
+
+# Рекомендована к-сть воркерів для пари source/output (визначає повільніший диск)
+def recommended_workers(src_root: Path, out_root: Path) -> int:
+    limits = []
+    for path in (src_root, out_root):
+        rotational = _is_rotational(path)
+        if rotational is None:
+            limits.append(_WORKERS_DEFAULT)
+        else:
+            limits.append(_WORKERS_HDD if rotational else _WORKERS_SSD)
+    return min(limits)
+
 # --------------------------- Core async ops ---------------------------
 
 # Асинхронне копіювання з ретраями та обробкою заблокованих файлів
-async def copy_with_retries(src: Path, dst: Path, retries: int, delay: float, skip_locked: bool) -> tuple[bool, str | None]:
+async def copy_with_retries(src: str, dst: str, copied: dict[tuple[int, int], Future[str | None]],
+                            retries: int, delay: float, skip_locked: bool) -> int:
     """
-    Повертає (success, reason).
-    success=False і reason='locked' для пропущених через skip_locked файлів.
-    success=False і reason='error' для інших помилок.
+    Повертає код результату.
+    _OK — файл скопійовано.
+    _LOCKED — файл пропущено через skip_locked.
+    _FAILED — інші помилки.
     """
     attempt = 0
     backoff = max(0.0, delay)
     while True:
         try:
-            await aioshutil.copy2(src, dst)
-            return True, None
+            await _copy2(src, dst, copied)
+            return _OK
         except Exception as exc:  # noqa: BLE001
             locked = _is_locked_error(exc)
             attempt += 1
 
             if locked and skip_locked:
                 logging.warning("Пропуск (locked): %s", src)
-                return False, "locked"
+                return _LOCKED
 
             if attempt > retries:
                 logging.error("Помилка копіювання '%s' -> '%s' після %d спроб: %s",
                               src, dst, retries, exc, exc_info=True)
-                return False, "error"
+                return _FAILED
 
             logging.warning("Помилка копіювання '%s' (%s). Повтор #%d через %.2fs",
                             src, exc, attempt, backoff)
             await asyncio.sleep(backoff)
             backoff *= 2  # експоненційний бекоф
 
-# Асинхронне копіювання файлу з обмеженням по кількості одночасних операцій
-async def copy_file(src: Path, out_root: Path, sem: asyncio.Semaphore,
-                    retries: int, delay: float, skip_locked: bool) -> tuple[bool, str | None]:
-    folder = ext_folder_name(src)
-    dst_dir = out_root / folder
+# Асинхронне копіювання одного файлу в підпапку за його розширенням
+async def copy_file(src: str, name: str, out_root: str,
+                    reserved: dict[str, set[str]], locks: defaultdict[str, asyncio.Lock],
+                    copied: dict[tuple[int, int], Future[str | None]],
+                    retries: int, delay: float, skip_locked: bool) -> int:
     try:
-        await _mkdir_async(dst_dir)
-        target = await asyncio.to_thread(_unique_target_path, dst_dir, src.name)
-        async with sem:
-            return await copy_with_retries(src, target, retries, delay, skip_locked)
+        target = await _reserve_target(out_root, ext_folder_name(name), name, reserved, locks)
+        return await copy_with_retries(src, target, copied, retries, delay, skip_locked)
     except Exception as exc:  # noqa: BLE001
         logging.error("Неочікувана помилка '%s': %s", src, exc, exc_info=True)
-        return False, "error"
+        return _FAILED
 
 
-# Рекурсивний обхід папки та планування асинхронних завдань копіювання
-async def read_folder(src_root: Path, out_root: Path, max_workers: int,
+# Рекурсивний обхід папки та копіювання фіксованим пулом воркерів
+async def read_folder(src_root: Path, out_root: Path, max_workers: int | None,
                       retries: int, delay: float, skip_locked: bool,
                       excludes: Sequence[str]) -> None:
     if not src_root.exists() or not src_root.is_dir():
         raise FileNotFoundError(f"Вихідна папка не існує або не є директорією: {src_root}")
 
-    await _mkdir_async(out_root)
+    recommended = recommended_workers(src_root, out_root)
+    if max_workers is None:
+        max_workers = recommended
+    elif max_workers > recommended:
+        logging.warning("max_workers=%d перевищує рекомендоване для цих дисків значення %d",
+                        max_workers, recommended)
 
-    sem = asyncio.Semaphore(max_workers)
-    tasks: list[asyncio.Task[tuple[bool, str | None]]] = []
+    # Пул потоків під копіювання: по потоку на воркер + один для обходу директорій
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_workers + 1))
 
-    files = list(iter_files_recursive(src_root, excludes))
-    if not files:
+    await _mkdir_async(out_root)
+
+    # Корінь виводу як рядок: шляхи призначення будуються через os.path.join
+    out_root_str = os.fspath(out_root)
+    reserved: dict[str, set[str]] = {}
+    locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+    # None у черзі — сигнал воркеру завершитися
+    queue: asyncio.Queue[FileItem | None] = asyncio.Queue(maxsize=max_workers * 4)
+    # inode джерела -> future з шляхом першої копії (для hard links у джерелі; див. _fast_copy)
+    copied: dict[tuple[int, int], Future[str | None]] = {}
+    # Лічильники за кодом результату: [_OK, _LOCKED, _FAILED]
+    counts = [0, 0, 0]
+
+    async def worker() -> None:
+        while (item := await queue.get()) is not None:
+            src, name = item
+            counts[await copy_file(src, name, out_root_str, reserved, locks, copied,
+                                   retries, delay, skip_locked)] += 1
+
+    dir_rules, file_rules = compile_excludes(excludes)
+    files = iter_files_recursive(src_root, dir_rules, file_rules)
+
+    logging.info("Запуск копіювання (max_workers=%d)", max_workers)
+
+    # Обхід іде порціями в окремому потоці й перекривається з копіюванням:
+    # наступна порція читається, поки поточна передається воркерам через чергу
+    async with asyncio.TaskGroup() as tg:
+        for _ in range(max_workers):
+            tg.create_task(worker())
+
+        pending = asyncio.ensure_future(asyncio.to_thread(_next_batch, files))
+        while batch := await pending:
+            pending = asyncio.ensure_future(asyncio.to_thread(_next_batch, files))
+            for item in batch:
+                await queue.put(item)
+
+        for _ in range(max_workers):
+            await queue.put(None)
+
+    ok, locked, failed = counts
+    if not (ok or locked or failed):
         logging.info("Файли не знайдено у: %s", src_root)
         return
 
-    for file_path in files:
-        tasks.append(asyncio.create_task(copy_file(file_path, out_root, sem, retries, delay, skip_locked)))
-
-    logging.info("Запущено копіювань: %d (max_workers=%d)", len(tasks), max_workers)
-
-    results = await asyncio.gather(*tasks, return_exceptions=False)
-
-    ok = sum(1 for s, _ in results if s)
-    locked = sum(1 for s, r in results if not s and r == "locked")
-    failed = sum(1 for s, r in results if not s and r == "error")
-
     if failed or locked:
         logging.warning("Завершено: успішно=%d, пропущено locked=%d, помилок=%d", ok, locked, failed)
     else:
@@ -215,7 +662,7 @@ async def read_folder(src_root: Path, out_root: Path, max_workers: int,
 def main() -> None:
     parser = build_parser()
     args = parser.parse_args()
-    setup_logging(args.log_level)
+    listener = setup_logging(args.log_level)
 
     src_root: Path = args.source
     out_root: Path = args.output
@@ -232,11 +679,15 @@ def main() -> None:
                 delay=args.retry_delay,
                 skip_locked=args.skip_locked,
                 excludes=args.exclude_glob or [],
-            )
+            ),
+            # uvloop (якщо встановлено) зменшує накладні витрати циклу подій на кожен await
+            loop_factory=uvloop.new_event_loop if uvloop is not None else None,
         )
     except Exception as exc:  # noqa: BLE001
         logging.exception("Критична помилка: %s", exc)
         raise SystemExit(1) from exc
+    finally:
+        listener.stop()
 
 
 if __name__ == "__main__":